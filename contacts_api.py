@@ -1,233 +1,287 @@
-import csv
-from pathlib import Path
-from typing import Optional
-
-from fastapi import FastAPI
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel, Field, EmailStr
-
-"""
-Program: Contacts Manager API
-Description: This is a simple FastAPI application to manage contacts. It supports the following 
-                operations: create a new contact, update a contact, and search for contacts
-                by name or email.
-"""
-
-# Path to the CSV file
-CONTACTS_FILE = 'contacts.csv'
-
-# Pydantic model for validating contact data
-
-
-class Contact(BaseModel):
-    name: str = Field(..., min_length=2, max_length=50,
-                      description="Contact's name")
-    email: Optional[EmailStr] = None
-    phone: str = Field(..., min_length=10, max_length=15,
-                       description="Contact's phone number")
-
-
-app = FastAPI()
-
-
-@app.post("/api/contacts")
-async def create_contact(contact: Contact):
-    """
-    Creates a new contact.
-
-    Args:
-        contact (Contact): The contact data to be created.
-
-    Returns:
-        JSONResponse: Contains a success message and created contact's data.
-
-    Note:
-        The `save_contacts` function saves a list of contact dictionaries to the CSV file.
-    """
-    contacts = retrieve_contacts()
-    contact_id = max([contact['id'] for contact in contacts], default=0) + 1
-    new_contact = {
-        'id': contact_id,
-        'name': contact.name,
-        'email': contact.email,
-        'phone': contact.phone
-    }
-    contacts.append(new_contact)
-    save_contacts(contacts)
-    response = {
-        "code": 200,
-        "message": "Contact created successfully",
-        "data": new_contact
-    }
-    return JSONResponse(content=response, status_code=200)
-
-
-@app.put("/api/contacts/{id}")
-async def update_contact(id: int, contact: Contact):
-    """
-    Update an existing a contact by ID.
-
-    Args:
-        id (int): The ID of the contact to retrieve.
-        contact (Contact): The updated contact data.
-
-    Returns:
-        JSONResponse: Contains a success message and updated contact's data or 
-                    an empty array if no contact with the specified ID exists.
-    """
-    contacts = retrieve_contacts()
-    existing_contact = next(
-        (contact for contact in contacts if contact['id'] == id), None)
-    if existing_contact is None:
-        response = {
-            "code": 404,
-            "message": "Contact does not exist",
-            "data": []
-        }
-        return JSONResponse(content=response, status_code=404)
-
-    existing_contact['name'] = contact.name
-    existing_contact['email'] = contact.email
-    existing_contact['phone'] = contact.phone
-    save_contacts(contacts)
-    response = {
-        "code": 200,
-        "message": "Contact updated successfully",
-        "data": existing_contact
-    }
-    return JSONResponse(content=response, status_code=200)
-
-
-@app.get("/api/contacts/search")
-async def search_contacts(query: str = ""):
-    """
-    Search for contacts by name or email.
-
-    Args:
-        query (str): The search query string.
-
-    Returns:
-        JSONResponse: Contains the data of contacts that match the search query in 
-                their name or email. If no query is provided, all contacts are returned.
-    """
-    contacts = retrieve_contacts()
-    query = query.lower()
-    matched_contacts = [contact for contact in contacts if query in
-                        contact['name'].lower() or query in contact['email'].lower()]
-    if not matched_contacts:
-        response = {
-            "code": 200,
-            "message": "No match found",
-            "data": []
-        }
-        return JSONResponse(content=response, status_code=200)
-
-    response = {
-        "code": 200,
-        "message": "Contacts retrieved successfully",
-        "data": matched_contacts
-    }
-    return JSONResponse(content=response, status_code=200)
-
-
-@app.get("/api/contacts/{id:int}")
-async def get_contact(id: int):
-    """
-    Retrieve an existing a contact by ID.
-
-    Args:
-        id (int): The ID of the contact to retrieve.
-
-    Returns:
-        ContactInResponse: The retrieved contact's response model.
-        JSONResponse: A JSON response with a 404 status code and an error message 
-                    if no contact with the specified ID is found.
-    """
-    contacts = retrieve_contacts()
-    contact = next(
-        (contact for contact in contacts if contact['id'] == id), None)
-    if contact is None:
-        response = {
-            "code": 404,
-            "message": "Contact does not exist"
-        }
-        return JSONResponse(content=response, status_code=404)
-
-    response = {
-        "code": 200,
-        "message": "Contact retrieved successfully",
-        "data": contact
-    }
-    return JSONResponse(content=response, status_code=200)
-
-
-@app.get("/api/contacts")
-def get_all_contacts():
-    """
-    Get the list of all contacts stored in csv file.
-
-    Returns:
-        JSONResponse: A response object containing the contacts data and a 200 HTTP status code.
-
-    Raises:
-        HTTPException: If the contacts cannot be retrieved, a 404 HTTP status code is returned.
-    """
-    contacts = retrieve_contacts()
-
-    if not contacts:
-        response = {
-            "code": 200,
-            "message": "No contacts found",
-            "data": []
-        }
-        return JSONResponse(content=response, status_code=200)
-
-    response = {
-        "code": 200,
-        "message": "Contacts retrieved successfully",
-        "data": contacts
-    }
-    return JSONResponse(content=response, status_code=200)
-
-
-def retrieve_contacts():
-    """
-    Helper function to retrieve contacts from the csv file.
-
-    Returns:
-        List[Contact]: A list of contact objects.
-    """
-    contacts = []
-    if Path(CONTACTS_FILE).exists():
-        with open(CONTACTS_FILE, mode='r', newline='') as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                contacts.append({
-                    'id': int(row.get('id')),
-                    'name': row.get('name'),
-                    'email': row.get('email'),
-                    'phone': row.get('phone')
-                })
-    return contacts
-
-
-def save_contacts(contacts):
-    """
-    Helper function to save a list of contact dictionaries to the CSV file.
-
-    Args:
-        contacts (List[dict]): A list of dictionaries, where each dictionary represents a contact.
-    Returns:
-        None: This function does not return any value.
-        """
-    with open(CONTACTS_FILE, mode='w', newline='') as file:
-        header_names = ['id', 'name', 'email', 'phone']
-        writer = csv.DictWriter(file, fieldnames=header_names)
-        writer.writeheader()
-        for contact in contacts:
-            writer.writerow(contact)
-
-
-if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host="127.0.0.1", port=8800)
+import asyncio
+import re
+from typing import Annotated, Optional
+
+import msgspec
+import orjson
+
+from fastapi import FastAPI, Request
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
+
+from storage import (append_contact, cached_body, contact_by_id,
+                     retrieve_contacts, save_contact, search, store_cached_body)
+
+"""
+Program: Contacts Manager API
+Description: This is a simple FastAPI application to manage contacts. It supports the following
+                operations: create a new contact, update a contact, and search for contacts
+                by name or email.
+"""
+
+# Serializes the read-modify-write sections of the mutating endpoints
+_WRITE_LOCK = asyncio.Lock()
+
+# Contact lists larger than this are streamed instead of buffered whole
+_STREAM_THRESHOLD = 1000
+
+# Accepts the overwhelmingly common user@host.tld shape; exotic but
+# technically valid addresses are rejected like EmailStr rejected them
+_EMAIL_RE = re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]+$')
+
+# msgspec struct for validating contact data
+
+
+class Contact(msgspec.Struct):
+    name: Annotated[str, msgspec.Meta(min_length=2, max_length=50,
+                                      description="Contact's name")]
+    phone: Annotated[str, msgspec.Meta(min_length=10, max_length=15,
+                                       description="Contact's phone number")]
+    email: Optional[str] = None
+
+
+_CONTACT_DECODER = msgspec.json.Decoder(Contact)
+
+
+def _parse_contact(body):
+    """
+    Decode and validate a request body into a Contact.
+
+    Args:
+        body (bytes): The raw JSON request body.
+
+    Returns:
+        Contact: The decoded contact.
+
+    Raises:
+        msgspec.ValidationError: If the body is malformed or a field
+                fails validation.
+    """
+    contact = _CONTACT_DECODER.decode(body)
+    if contact.email is not None and not _EMAIL_RE.match(contact.email):
+        raise msgspec.ValidationError('Invalid email address')
+    return contact
+
+
+app = FastAPI(default_response_class=ORJSONResponse)
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
+
+@app.get("/api/contacts/search")
+async def search_contacts(query: str = ""):
+    """
+    Search for contacts by name or email.
+
+    Args:
+        query (str): The search query string.
+
+    Returns:
+        ORJSONResponse: Contains the data of contacts that match the search query in
+                their name or email. If no query is provided, all contacts are returned.
+    """
+    await retrieve_contacts()
+    matched_contacts = search(query)
+    if not matched_contacts:
+        response = {
+            "code": 200,
+            "message": "No match found",
+            "data": []
+        }
+        return ORJSONResponse(content=response, status_code=200)
+
+    response = {
+        "code": 200,
+        "message": "Contacts retrieved successfully",
+        "data": matched_contacts
+    }
+    return ORJSONResponse(content=response, status_code=200)
+
+
+@app.get("/api/contacts")
+async def get_all_contacts():
+    """
+    Get the list of all stored contacts.
+
+    Returns:
+        ORJSONResponse: A response object containing the contacts data and a 200 HTTP status code.
+
+    Raises:
+        HTTPException: If the contacts cannot be retrieved, a 404 HTTP status code is returned.
+
+    Note:
+        The serialized body is cached between writes, so repeated calls
+        reuse the same bytes instead of re-encoding the full list. Very
+        large lists are streamed contact by contact instead, which keeps
+        memory flat rather than building the whole body up front.
+    """
+    contacts = await retrieve_contacts()
+
+    if not contacts:
+        response = {
+            "code": 200,
+            "message": "No contacts found",
+            "data": []
+        }
+        return ORJSONResponse(content=response, status_code=200)
+
+    if len(contacts) > _STREAM_THRESHOLD:
+        return StreamingResponse(_stream_contacts(contacts),
+                                 media_type="application/json")
+
+    body = cached_body()
+    if body is None:
+        response = {
+            "code": 200,
+            "message": "Contacts retrieved successfully",
+            "data": contacts
+        }
+        body = orjson.dumps(response)
+        store_cached_body(body)
+    return Response(content=body, media_type="application/json")
+
+
+async def _stream_contacts(contacts):
+    """
+    Generate the full-list response body one contact at a time.
+
+    Args:
+        contacts (List[dict]): The cached contacts to serialize.
+
+    Yields:
+        bytes: Chunks of the JSON response body.
+    """
+    yield b'{"code":200,"message":"Contacts retrieved successfully","data":['
+    first = True
+    for contact in contacts:
+        if first:
+            first = False
+        else:
+            yield b','
+        yield orjson.dumps(contact)
+    yield b']}'
+
+
+@app.post("/api/contacts")
+async def create_contact(request: Request):
+    """
+    Creates a new contact.
+
+    Args:
+        request (Request): The request whose JSON body holds the contact data.
+
+    Returns:
+        ORJSONResponse: Contains a success message and created contact's data,
+                or a 422 error message when the body fails validation.
+
+    Note:
+        The `append_contact` function inserts the new contact into the
+        database and fills in the id SQLite assigned to it.
+    """
+    try:
+        contact = _parse_contact(await request.body())
+    except msgspec.DecodeError as error:
+        response = {
+            "code": 422,
+            "message": str(error),
+            "data": []
+        }
+        return ORJSONResponse(content=response, status_code=422)
+
+    async with _WRITE_LOCK:
+        await retrieve_contacts()
+        new_contact = {
+            'id': None,  # assigned by SQLite on insert
+            'name': contact.name,
+            'email': contact.email,
+            'phone': contact.phone
+        }
+        await append_contact(new_contact)
+    response = {
+        "code": 200,
+        "message": "Contact created successfully",
+        "data": new_contact
+    }
+    return ORJSONResponse(content=response, status_code=200)
+
+
+@app.get("/api/contacts/{id:int}")
+async def get_contact(id: int):
+    """
+    Retrieve an existing a contact by ID.
+
+    Args:
+        id (int): The ID of the contact to retrieve.
+
+    Returns:
+        ContactInResponse: The retrieved contact's response model.
+        ORJSONResponse: A JSON response with a 404 status code and an error message
+                    if no contact with the specified ID is found.
+    """
+    await retrieve_contacts()
+    contact = contact_by_id(id)
+    if contact is None:
+        response = {
+            "code": 404,
+            "message": "Contact does not exist"
+        }
+        return ORJSONResponse(content=response, status_code=404)
+
+    response = {
+        "code": 200,
+        "message": "Contact retrieved successfully",
+        "data": contact
+    }
+    return ORJSONResponse(content=response, status_code=200)
+
+
+@app.put("/api/contacts/{id}")
+async def update_contact(id: int, request: Request):
+    """
+    Update an existing a contact by ID.
+
+    Args:
+        id (int): The ID of the contact to retrieve.
+        request (Request): The request whose JSON body holds the updated data.
+
+    Returns:
+        ORJSONResponse: Contains a success message and updated contact's data or
+                    an empty array if no contact with the specified ID exists,
+                    or a 422 error message when the body fails validation.
+    """
+    try:
+        contact = _parse_contact(await request.body())
+    except msgspec.DecodeError as error:
+        response = {
+            "code": 422,
+            "message": str(error),
+            "data": []
+        }
+        return ORJSONResponse(content=response, status_code=422)
+
+    async with _WRITE_LOCK:
+        await retrieve_contacts()
+        existing_contact = contact_by_id(id)
+        if existing_contact is None:
+            response = {
+                "code": 404,
+                "message": "Contact does not exist",
+                "data": []
+            }
+            return ORJSONResponse(content=response, status_code=404)
+
+        existing_contact['name'] = contact.name
+        existing_contact['email'] = contact.email
+        existing_contact['phone'] = contact.phone
+        await save_contact(existing_contact)
+    response = {
+        "code": 200,
+        "message": "Contact updated successfully",
+        "data": existing_contact
+    }
+    return ORJSONResponse(content=response, status_code=200)
+
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host="127.0.0.1", port=8800,
+                loop="uvloop", http="httptools")
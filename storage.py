@@ -0,0 +1,371 @@
+import asyncio
+import csv
+import sqlite3
+from pathlib import Path
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pa_compute
+    import pyarrow.csv as pa_csv
+except ImportError:  # pyarrow is optional; stdlib fallbacks cover everything
+    pa = pa_compute = pa_csv = None
+
+"""
+Module: Contacts storage layer
+Description: Owns the SQLite database, the in-memory contact cache and the
+                lookup/search indexes built over it. The route handlers in
+                contacts_api only go through the functions exported here.
+"""
+
+# Path to the SQLite database file
+DB_FILE = 'contacts.db'
+
+# Path to the legacy CSV file, imported into SQLite once if present
+CONTACTS_FILE = 'contacts.csv'
+
+# Shared SQLite connection, created lazily on first use
+_CONN = None
+
+# In-memory cache of the contacts table, reloaded on demand
+_CACHE = None
+
+# Database change counter seen when the cache was built; commits from
+# other processes bump it, which forces a reload on the next read
+_CACHE_VERSION = None
+
+# Serialized response body for the full contact list, dropped on every write
+_CACHED_JSON = None
+
+# Secondary index over the cache for O(1) lookups by contact id
+_BY_ID = {}
+
+# Precomputed (lowercase name bytes, lowercase email bytes, contact) rows
+# for search; the keys are UTF-8 bytes so matching runs through bytes.find
+_SEARCH_INDEX = []
+
+# Columnar (structure-of-arrays) copies of the lowercase keys for
+# pyarrow's vectorized substring kernel; rebuilt lazily after writes
+_NAME_COLUMN = None
+_EMAIL_COLUMN = None
+
+
+def _index_contacts(contacts):
+    """
+    Helper function to rebuild the id index and the search indexes
+    whenever the cache is (re)built.
+
+    Args:
+        contacts (List[dict]): The freshly cached list of contacts.
+    Returns:
+        None: This function does not return any value.
+    """
+    global _BY_ID, _SEARCH_INDEX, _CACHED_JSON
+    global _NAME_COLUMN, _EMAIL_COLUMN
+    _CACHED_JSON = None
+    _NAME_COLUMN = _EMAIL_COLUMN = None
+    _BY_ID = {contact['id']: contact for contact in contacts}
+    _SEARCH_INDEX = [((contact['name'] or '').lower().encode(),
+                      (contact['email'] or '').lower().encode(),
+                      contact) for contact in contacts]
+
+
+def _add_to_index(contact):
+    """
+    Helper function to insert a single new contact into the indexes
+    without rebuilding them.
+
+    Args:
+        contact (dict): The contact that was just added to the cache.
+    Returns:
+        None: This function does not return any value.
+    """
+    global _CACHED_JSON, _NAME_COLUMN, _EMAIL_COLUMN
+    _CACHED_JSON = None
+    _NAME_COLUMN = _EMAIL_COLUMN = None
+    _BY_ID[contact['id']] = contact
+    name_key = (contact['name'] or '').lower().encode()
+    email_key = (contact['email'] or '').lower().encode()
+    _SEARCH_INDEX.append((name_key, email_key, contact))
+
+
+def contact_by_id(id):
+    """
+    Look up a cached contact by its id.
+
+    Args:
+        id (int): The ID of the contact to retrieve.
+
+    Returns:
+        dict: The cached contact, or None if the id is unknown.
+    """
+    return _BY_ID.get(id)
+
+
+def search(query):
+    """
+    Search the cached contacts by name or email.
+
+    Args:
+        query (str): The search query string.
+
+    Returns:
+        List[dict]: The contacts whose name or email contains the query,
+                case-insensitively. An empty query matches every contact.
+
+    Note:
+        With pyarrow installed, matching runs as one vectorized
+        match_substring call per column over columnar copies of the
+        lowercase keys. Otherwise it falls back to a bytes.find scan of
+        the precomputed UTF-8 keys.
+    """
+    query = query.lower()
+    if pa is not None:
+        _ensure_search_columns()
+        mask = pa_compute.or_(
+            pa_compute.match_substring(_NAME_COLUMN, query),
+            pa_compute.match_substring(_EMAIL_COLUMN, query))
+        return [_SEARCH_INDEX[i][2]
+                for i in pa_compute.indices_nonzero(mask).to_pylist()]
+    query = query.encode()
+    return [contact for name_key, email_key, contact in _SEARCH_INDEX
+            if name_key.find(query) >= 0 or email_key.find(query) >= 0]
+
+
+def _ensure_search_columns():
+    """
+    Helper function to (re)build the columnar search keys after a write
+    dropped them. Arrow arrays are immutable, so they are rebuilt lazily
+    on the next search rather than on every insert.
+
+    Returns:
+        None: This function does not return any value.
+    """
+    global _NAME_COLUMN, _EMAIL_COLUMN
+    if _NAME_COLUMN is None:
+        # the explicit type matters when there are no contacts yet: an
+        # empty untyped array would be null-typed, which match_substring
+        # has no kernel for
+        _NAME_COLUMN = pa.array([entry[0].decode()
+                                 for entry in _SEARCH_INDEX],
+                                type=pa.string())
+        _EMAIL_COLUMN = pa.array([entry[1].decode()
+                                  for entry in _SEARCH_INDEX],
+                                 type=pa.string())
+
+
+def cached_body():
+    """
+    Return the cached serialized body for the full contact list.
+
+    Returns:
+        bytes: The cached body, or None if a write invalidated it.
+    """
+    return _CACHED_JSON
+
+
+def store_cached_body(body):
+    """
+    Remember the serialized body for the full contact list until the
+    next write invalidates it.
+
+    Args:
+        body (bytes): The serialized response body.
+    Returns:
+        None: This function does not return any value.
+    """
+    global _CACHED_JSON
+    _CACHED_JSON = body
+
+
+async def retrieve_contacts():
+    """
+    Helper function to retrieve contacts without blocking the event loop.
+
+    The synchronous database read runs in the default executor so the
+    event loop can keep serving other requests while the disk is busy.
+
+    Returns:
+        List[Contact]: A list of contact objects.
+    """
+    return await asyncio.get_running_loop().run_in_executor(
+        None, _retrieve_contacts_sync)
+
+
+async def save_contact(contact):
+    """
+    Helper function to persist changes to one contact without blocking
+    the event loop.
+
+    Args:
+        contact (dict): The already-mutated cached contact to persist.
+    Returns:
+        None: This function does not return any value.
+    """
+    await asyncio.get_running_loop().run_in_executor(
+        None, _save_contact_sync, contact)
+
+
+async def append_contact(contact):
+    """
+    Helper function to persist a single new contact without blocking
+    the event loop. The contact's 'id' field is filled in with the id
+    SQLite assigned on insert.
+
+    Args:
+        contact (dict): The contact to insert into the database.
+    Returns:
+        None: This function does not return any value.
+    """
+    await asyncio.get_running_loop().run_in_executor(
+        None, _append_contact_sync, contact)
+
+
+def _get_connection():
+    """
+    Helper function to open the shared database connection on first use.
+
+    Creates the contacts table and its lookup indexes if they do not
+    exist yet, enables WAL so readers are not blocked by writers, and
+    imports a legacy contacts.csv into an empty database.
+
+    Returns:
+        sqlite3.Connection: The shared connection.
+    """
+    global _CONN
+    if _CONN is None:
+        conn = sqlite3.connect(DB_FILE, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS contacts (
+                id INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                email TEXT,
+                phone TEXT NOT NULL
+            )''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_contacts_name '
+                     'ON contacts(name COLLATE NOCASE)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_contacts_email '
+                     'ON contacts(email COLLATE NOCASE)')
+        conn.commit()
+        _import_legacy_csv(conn)
+        _CONN = conn
+    return _CONN
+
+
+def _import_legacy_csv(conn):
+    """
+    Helper function to import a pre-existing contacts.csv into an empty
+    database, so data from the CSV-backed version of the app survives
+    the switch to SQLite.
+
+    When pyarrow is installed its multithreaded C++ CSV reader parses
+    the file; otherwise the stdlib csv module is used row by row.
+
+    Args:
+        conn (sqlite3.Connection): The connection to import into.
+    Returns:
+        None: This function does not return any value.
+    """
+    if not Path(CONTACTS_FILE).exists():
+        return
+    if conn.execute('SELECT 1 FROM contacts LIMIT 1').fetchone() is not None:
+        return
+    if pa_csv is not None:
+        # phone numbers must stay strings; inference would read them as
+        # integers and drop leading zeros
+        options = pa_csv.ConvertOptions(column_types={
+            'id': pa.int64(), 'name': pa.string(),
+            'email': pa.string(), 'phone': pa.string()})
+        table = pa_csv.read_csv(CONTACTS_FILE, convert_options=options)
+        rows = list(zip(table['id'].to_pylist(), table['name'].to_pylist(),
+                        table['email'].to_pylist(),
+                        table['phone'].to_pylist()))
+    else:
+        with open(CONTACTS_FILE, mode='r', newline='',
+                  buffering=1 << 16) as file:
+            reader = csv.reader(file)
+            next(reader, None)  # header row
+            rows = [(int(row[0]), row[1], row[2], row[3]) for row in reader]
+    conn.executemany(
+        'INSERT INTO contacts (id, name, email, phone) VALUES (?, ?, ?, ?)',
+        rows)
+    conn.commit()
+
+
+def _retrieve_contacts_sync():
+    """
+    Helper function to retrieve contacts from the database.
+
+    The rows are cached in memory after the first load, together with
+    SQLite's data_version counter. The counter only moves when another
+    connection commits, so a single cheap PRAGMA per read keeps every
+    worker process's cache in sync with writes made by its siblings,
+    while reads in the writing process stay on the in-place-updated
+    cache. Callers share the cached list, so they must either treat it
+    as read-only or persist their mutations with
+    `save_contact`/`append_contact`.
+
+    Returns:
+        List[Contact]: A list of contact objects.
+    """
+    global _CACHE, _CACHE_VERSION
+    conn = _get_connection()
+    version = conn.execute('PRAGMA data_version').fetchone()[0]
+    if _CACHE is not None and version == _CACHE_VERSION:
+        return _CACHE
+    contacts = [{'id': row[0], 'name': row[1], 'email': row[2],
+                 'phone': row[3]}
+                for row in conn.execute(
+                    'SELECT id, name, email, phone FROM contacts ORDER BY id')]
+    _CACHE = contacts
+    _CACHE_VERSION = version
+    _index_contacts(contacts)
+    return contacts
+
+
+def _save_contact_sync(contact):
+    """
+    Helper function to write one updated contact back to the database.
+
+    Args:
+        contact (dict): The already-mutated cached contact to persist.
+    Returns:
+        None: This function does not return any value.
+    """
+    conn = _get_connection()
+    conn.execute('UPDATE contacts SET name = ?, email = ?, phone = ? '
+                 'WHERE id = ?',
+                 (contact['name'], contact['email'], contact['phone'],
+                  contact['id']))
+    conn.commit()
+    # the contact's lowercase search keys may have changed with it
+    _index_contacts(_CACHE or [])
+
+
+def _append_contact_sync(contact):
+    """
+    Helper function to insert one new contact into the database and
+    fold it into the cache and indexes in place.
+
+    The id is left for SQLite to assign: the INTEGER PRIMARY KEY hands
+    out the next id atomically under the database's own write lock, so
+    concurrent worker processes can never allocate the same id no
+    matter how stale their caches are.
+
+    Args:
+        contact (dict): The contact to insert; its 'id' field is set
+                from the assigned rowid.
+    Returns:
+        None: This function does not return any value.
+    """
+    global _CACHE
+    conn = _get_connection()
+    cursor = conn.execute(
+        'INSERT INTO contacts (name, email, phone) VALUES (?, ?, ?)',
+        (contact['name'], contact['email'], contact['phone']))
+    conn.commit()
+    contact['id'] = cursor.lastrowid
+    if _CACHE is None:
+        _CACHE = []
+    _CACHE.append(contact)
+    _add_to_index(contact)